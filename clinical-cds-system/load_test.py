@@ -0,0 +1,449 @@
+"""
+Offline load-test harness for the Diagnosense API (api_server.py).
+
+By default the Flask app is started in-process on a free local port with a
+stand-in `model_logic` module, so no Gemini / Geoapify keys, torch or
+sentence-transformers are needed. The fake embedding, LLM and places backends
+have configurable latency, jitter and error rates, which lets us find saturation
+points of the API layer itself before they happen in production.
+
+Traffic is built from the bundled datasets:
+  - Symptom2Disease.csv          -> symptom text + disease labels
+  - patient_lab_reports_1000.csv -> patient profiles + lab vitals
+
+Examples:
+    python load_test.py --rps 50 --concurrency 16 --duration 30
+    python load_test.py --llm-latency 2000 --llm-error-rate 0.05 --mix reasoning=1
+    python load_test.py --diagnosis-latency 250 --mix diagnosis=1
+    python load_test.py --base-url http://localhost:5000   # drive a real server
+"""
+import argparse
+import ast
+import contextlib
+import io
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import types
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_LOGIC_PY = os.path.join(BASE_DIR, "model_logic.py")
+SYMPTOMS_CSV = os.path.join(BASE_DIR, "Symptom2Disease.csv")
+LAB_REPORTS_CSV = os.path.join(BASE_DIR, "..", "patient_lab_reports_1000.csv")
+
+ENDPOINTS = ("diagnosis", "reasoning", "medicine", "doctors")
+# Roughly what the frontend does: every diagnosis is followed by a reasoning
+# call, while medicine / doctor lookups only happen for some sessions.
+DEFAULT_MIX = "diagnosis=4,reasoning=4,medicine=1,doctors=1"
+
+# Fallback text returned by model_logic.get_gemini_reasoning when Gemini fails
+REASONING_FALLBACK = "⚠️ Clinical reasoning engine temporarily unavailable"
+
+# Patients are placed around a few Indian metros for the doctor lookups
+CITY_CENTRES = [
+    (28.6139, 77.2090),  # Delhi
+    (19.0760, 72.8777),  # Mumbai
+    (12.9716, 77.5946),  # Bengaluru
+    (22.5726, 88.3639),  # Kolkata
+    (13.0827, 80.2707),  # Chennai
+]
+
+
+# -------------------- FAKE BACKENDS --------------------
+class FakeBackend:
+    """Simulated remote dependency with latency, jitter and random failures."""
+
+    def __init__(self, name, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self):
+        """Sleeps for the simulated round trip, then raises on injected errors."""
+        with self._lock:
+            delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+            failed = self._rng.random() < self.error_rate
+        time.sleep(max(delay, 0.0) / 1000.0)
+        if failed:
+            raise RuntimeError(f"{self.name}: injected failure")
+
+
+class FakeEmbedder(FakeBackend):
+    """Stand-in for SentenceTransformer encoding + cosine search over the dataset."""
+
+    def top_k(self, user_input, labels, vocab, k=3):
+        self.call()
+        words = set(re.findall(r"\w+", user_input.lower()))
+        # Server threads share this backend, so draw from its own stream
+        # under the lock rather than the workload's
+        with self._lock:
+            scored = sorted(labels, key=lambda l: (len(vocab[l] & words), self._rng.random()), reverse=True)
+            confidences = [round(self._rng.uniform(40, 95), 2) for _ in range(k)]
+        return [{"label": l, "confidence": c} for l, c in zip(scored[:k], confidences)]
+
+
+class FakeLLM(FakeBackend):
+    """Stand-in for the Gemini client (`client.models.generate_content`)."""
+
+    @property
+    def models(self):
+        return self
+
+    def generate_content(self, model, contents):
+        self.call()
+        text = f"1. **Clinical Reasoning**: Simulated {model} analysis ({len(contents)} chars of context)."
+        return types.SimpleNamespace(text=text)
+
+
+class FakePlaces(FakeBackend):
+    """Stand-in for the Geoapify Places API."""
+
+    def search(self, lat, lng, limit=3):
+        self.call()
+        return [
+            {"name": f"Clinic #{i + 1}", "address_line2": f"{lat:.4f}, {lng:.4f}"}
+            for i in range(limit)
+        ]
+
+
+def load_model_logic_defs(names, namespace):
+    """
+    Executes the named top-level assignments / functions of model_logic.py
+    into `namespace`. This reuses the real lookup tables and logic without
+    importing the module, which would load the models and need API keys.
+    """
+    with open(MODEL_LOGIC_PY, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), MODEL_LOGIC_PY)
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            node_names = {node.name}
+        elif isinstance(node, ast.Assign):
+            node_names = {t.id for t in node.targets if isinstance(t, ast.Name)}
+        else:
+            continue
+        if node_names & set(names):
+            nodes.append(node)
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), MODEL_LOGIC_PY, "exec"), namespace)
+    return namespace
+
+
+def build_fake_model_logic(labels, embedder, llm, places):
+    """
+    Builds a module exposing the same functions api_server.py imports from
+    model_logic. Medicine lookup and Gemini reasoning run the real code
+    against a fake `client`; diagnosis and doctor lookups are backed by the
+    fake embedding / places services. Error handling mirrors model_logic:
+    diagnosis failures raise, failed remote calls degrade instead.
+    """
+    module = types.ModuleType("model_logic")
+    module.client = llm
+    load_model_logic_defs(
+        ["specialist_map", "detailed_med_map", "get_medicine_details", "get_gemini_reasoning"],
+        module.__dict__,
+    )
+    vocab = {label: set(re.findall(r"\w+", label.lower())) for label in labels}
+
+    def get_top_3_diagnosis(user_input: str, mode: str = "Fast"):
+        return embedder.top_k(user_input, labels, vocab)
+
+    def get_nearby_doctors(disease_label, lat, lng):
+        specialist = module.specialist_map.get(disease_label, "General Physician")
+        try:
+            return [
+                {"name": p["name"], "address": p["address_line2"], "rating": "N/A",
+                 "specialty": specialist}
+                for p in places.search(float(lat), float(lng))
+            ]
+        except Exception:
+            return []
+
+    module.get_top_3_diagnosis = get_top_3_diagnosis
+    module.get_nearby_doctors = get_nearby_doctors
+    return module
+
+
+def start_local_server(fake_module):
+    """Serves api_server.app on a free port with the fake model_logic installed."""
+    from werkzeug.serving import make_server
+
+    # api_server imports model_logic lazily inside each handler
+    sys.modules["model_logic"] = fake_module
+    sys.path.insert(0, BASE_DIR)
+    from api_server import app
+
+    # Per-request access logs would swamp the report
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# -------------------- WORKLOAD --------------------
+def load_workload_data(rng):
+    """Loads symptom texts and patient profiles from the bundled CSVs."""
+    symptoms = pd.read_csv(SYMPTOMS_CSV)[["label", "text"]].dropna()
+    symptoms["label"] = symptoms["label"].str.strip()
+
+    # "None" is a real value in the history / allergy columns, not a missing one
+    reports = pd.read_csv(LAB_REPORTS_CSV, keep_default_na=False)
+    patients = []
+    for row in reports.itertuples(index=False):
+        patients.append({
+            "age": int(row.Age),
+            "gender": row.Gender,
+            "weight": rng.randint(45, 100),
+            "chronic": [row.Prior_Medical_History],
+            "allergies": [row.Allergies],
+            "labs": {
+                "blood_sugar": int(row.Blood_Sugar_mg_dL),
+                "systolic_bp": int(row.BP_Systolic_mmHg),
+                # The lab reports carry no SpO2 column, keep it mostly normal
+                "spo2": rng.choice([88, 93] + [97, 98, 99] * 6),
+            },
+        })
+    return list(symptoms.itertuples(index=False)), patients
+
+
+def parse_mix(spec):
+    """Parses 'diagnosis=4,reasoning=2' into endpoint weights."""
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight or 1)
+        if weights[name] < 0:
+            raise argparse.ArgumentTypeError(f"Weight for '{name}' must not be negative")
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("Mix needs at least one positive weight")
+    return weights
+
+
+def build_request(rng, endpoint, symptom_rows, patients, labels):
+    """Returns (method, path, json_body) for one realistic request."""
+    case = rng.choice(symptom_rows)
+    if endpoint == "diagnosis":
+        return "POST", "/api/diagnosis", {
+            "symptoms": case.text,
+            "mode": rng.choice(["Fast", "Expert"]),
+            "selectedBodyPart": None,
+        }
+    if endpoint == "reasoning":
+        others = rng.sample([l for l in labels if l != case.label], 2)
+        candidates = [{"label": l, "confidence": round(rng.uniform(40, 95), 2)}
+                      for l in [case.label] + others]
+        return "POST", "/api/reasoning", {
+            "user_data": rng.choice(patients),
+            "symptoms": case.text,
+            "candidates": candidates,
+        }
+    if endpoint == "medicine":
+        return "GET", f"/api/medicine/{case.label}", None
+    lat, lng = rng.choice(CITY_CENTRES)
+    return "POST", "/api/doctors", {
+        "disease": case.label,
+        "lat": lat + rng.uniform(-0.05, 0.05),
+        "lng": lng + rng.uniform(-0.05, 0.05),
+    }
+
+
+def is_degraded(endpoint, payload):
+    """Detects 200 responses that silently fell back after an upstream failure."""
+    if endpoint == "reasoning":
+        return payload.get("reasoning", "").startswith(REASONING_FALLBACK)
+    if endpoint == "doctors":
+        return not payload.get("doctors")
+    return False
+
+
+# -------------------- RUNNER --------------------
+class Stats:
+    """Thread-safe per-endpoint latency and outcome collection."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.degraded = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency_ms, error=False, degraded=False):
+        with self._lock:
+            self.latencies[endpoint].append(latency_ms)
+            self.errors[endpoint] += int(error)
+            self.degraded[endpoint] += int(degraded)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def run_load(rng, base_url, rps, concurrency, duration, mix, symptom_rows, patients, labels, timeout):
+    """Open-loop load at a target RPS, capped at `concurrency` requests in flight."""
+    stats = Stats()
+    names, weights = zip(*mix.items())
+    in_flight = threading.BoundedSemaphore(concurrency)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def fire(endpoint, method, path, body):
+        start = time.perf_counter()
+        try:
+            resp = session.request(method, base_url + path, json=body, timeout=timeout)
+            latency = (time.perf_counter() - start) * 1000
+            # Some Symptom2Disease labels have no medication entry; that 404
+            # is the endpoint working as designed, not a failure
+            if endpoint == "medicine" and resp.status_code == 404:
+                stats.record(endpoint, latency)
+            elif resp.ok:
+                stats.record(endpoint, latency, degraded=is_degraded(endpoint, resp.json()))
+            else:
+                stats.record(endpoint, latency, error=True)
+        except Exception:
+            stats.record(endpoint, (time.perf_counter() - start) * 1000, error=True)
+        finally:
+            in_flight.release()
+
+    interval = 1.0 / rps
+    dropped = 0
+    started = time.perf_counter()
+    next_at = started
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while time.perf_counter() - started < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_at += interval
+            # Saturated: count the request as dropped rather than queueing it,
+            # so achieved RPS falls below target instead of latency hiding it
+            if not in_flight.acquire(blocking=False):
+                dropped += 1
+                continue
+            endpoint = rng.choices(names, weights=weights)[0]
+            pool.submit(fire, endpoint, *build_request(rng, endpoint, symptom_rows, patients, labels))
+        # Rates are measured over the send window only; waiting for the
+        # stragglers below would understate them
+        send_ended = time.perf_counter()
+    drain = time.perf_counter() - send_ended
+    return stats, send_ended - started, drain, dropped
+
+
+def print_report(stats, elapsed, drain, dropped, target_rps):
+    """Prints throughput, latency percentiles and error rates per endpoint."""
+    header = f"{'endpoint':<10} {'count':>7} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'err%':>7} {'degr%':>7}"
+    print("\n📊 Load Test Results (latency in ms)")
+    print(header)
+    print("-" * len(header))
+    total = total_errors = total_degraded = 0
+    all_latencies = []
+    for endpoint in ENDPOINTS:
+        values = sorted(stats.latencies.get(endpoint, []))
+        if not values:
+            continue
+        count = len(values)
+        total += count
+        total_errors += stats.errors[endpoint]
+        total_degraded += stats.degraded[endpoint]
+        all_latencies.extend(values)
+        print(f"{endpoint:<10} {count:>7} {count / elapsed:>8.1f} {percentile(values, 50):>8.1f} "
+              f"{percentile(values, 90):>8.1f} {percentile(values, 99):>8.1f} {values[-1]:>8.1f} "
+              f"{100.0 * stats.errors[endpoint] / count:>7.2f} {100.0 * stats.degraded[endpoint] / count:>7.2f}")
+    if not total:
+        print("No requests completed.")
+        return
+    all_latencies.sort()
+    print("-" * len(header))
+    print(f"{'total':<10} {total:>7} {total / elapsed:>8.1f} {percentile(all_latencies, 50):>8.1f} "
+          f"{percentile(all_latencies, 90):>8.1f} {percentile(all_latencies, 99):>8.1f} {all_latencies[-1]:>8.1f} "
+          f"{100.0 * total_errors / total:>7.2f} {100.0 * total_degraded / total:>7.2f}")
+    print(f"\n🎯 Target {target_rps:.1f} rps, achieved {total / elapsed:.1f} rps over a {elapsed:.1f}s send window")
+    print(f"⏳ {drain:.1f}s spent draining in-flight requests after the send window")
+    if dropped:
+        print(f"⚠️  {dropped} requests dropped because the concurrency limit was saturated")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the Diagnosense API")
+    parser.add_argument("--base-url", help="Drive an already running server instead of the in-process fake stack")
+    parser.add_argument("--rps", type=float, default=20.0, help="Target requests per second")
+    parser.add_argument("--concurrency", type=int, default=10, help="Maximum requests in flight")
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Endpoint weights, e.g. '{DEFAULT_MIX}'")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--diagnosis-latency", type=float, default=40.0, help="Fake embedding search latency (ms)")
+    parser.add_argument("--diagnosis-jitter", type=float, default=15.0, help="Fake embedding search jitter (ms)")
+    parser.add_argument("--diagnosis-error-rate", type=float, default=0.0, help="Fake embedding failure probability")
+    parser.add_argument("--llm-latency", type=float, default=800.0, help="Fake Gemini latency (ms)")
+    parser.add_argument("--llm-jitter", type=float, default=300.0, help="Fake Gemini latency jitter (ms)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fake Gemini failure probability")
+    parser.add_argument("--places-latency", type=float, default=150.0, help="Fake Geoapify latency (ms)")
+    parser.add_argument("--places-jitter", type=float, default=50.0, help="Fake Geoapify latency jitter (ms)")
+    parser.add_argument("--places-error-rate", type=float, default=0.0, help="Fake Geoapify failure probability")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible request mix")
+    args = parser.parse_args(argv)
+
+    if args.rps <= 0 or args.concurrency <= 0:
+        parser.error("--rps and --concurrency must be positive")
+    # The workload gets its own stream so server-side draws cannot perturb it
+    rng = random.Random(args.seed)
+
+    symptom_rows, patients = load_workload_data(rng)
+    labels = sorted({row.label for row in symptom_rows})
+
+    server = None
+    base_url = args.base_url
+    if base_url:
+        base_url = base_url.rstrip("/")
+    else:
+        # Distinct seeds per backend so injected faults stay independent
+        def backend_seed(offset):
+            return None if args.seed is None else args.seed + offset
+
+        embedder = FakeEmbedder("embeddings", args.diagnosis_latency, args.diagnosis_jitter,
+                                args.diagnosis_error_rate, backend_seed(1))
+        llm = FakeLLM("gemini", args.llm_latency, args.llm_jitter, args.llm_error_rate, backend_seed(2))
+        places = FakePlaces("geoapify", args.places_latency, args.places_jitter, args.places_error_rate,
+                            backend_seed(3))
+        server, base_url = start_local_server(build_fake_model_logic(labels, embedder, llm, places))
+
+    print(f"🚀 Load testing {base_url} at {args.rps:.1f} rps, concurrency {args.concurrency}, {args.duration:.0f}s")
+    print(f"📋 Workload: {len(symptom_rows)} symptom cases, {len(patients)} patient profiles, mix {args.mix}")
+    # api_server prints one line per failed request; with an in-process
+    # server those would land in the middle of the report
+    server_log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(server_log if server else sys.stdout):
+            stats, elapsed, drain, dropped = run_load(rng, base_url, args.rps, args.concurrency, args.duration,
+                                                      args.mix, symptom_rows, patients, labels, args.timeout)
+    finally:
+        if server:
+            server.shutdown()
+    print_report(stats, elapsed, drain, dropped, args.rps)
+    suppressed = server_log.getvalue().count("\n")
+    if suppressed:
+        print(f"🔇 {suppressed} server log lines suppressed")
+
+
+if __name__ == "__main__":
+    main()